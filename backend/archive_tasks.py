@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Task archival job - folds completed tasks older than TASK_ARCHIVE_AFTER_MONTHS into
+the archive partition and creates upcoming monthly partitions
+Usage: python archive_tasks.py (e.g. nightly from cron)
+"""
+
+from database import engine
+from partitions import archive_cutoff, archive_completed_tasks, ensure_task_partitions
+
+def archive_tasks():
+    """Archive old completed tasks and pre-create future partitions"""
+    
+    print(f"Archiving completed tasks created before {archive_cutoff():%Y-%m-%d}...")
+    
+    try:
+        moved = archive_completed_tasks(engine)
+        with engine.begin() as conn:
+            created = ensure_task_partitions(conn)
+        
+        print(f"✅ Archived {moved} completed tasks")
+        if created:
+            print(f"📊 Created partitions: {', '.join(created)}")
+        
+    except Exception as e:
+        print(f"❌ Error archiving tasks: {e}")
+        return False
+    
+    return True
+
+if __name__ == "__main__":
+    archive_tasks()
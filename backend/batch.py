@@ -0,0 +1,80 @@
+import json
+from typing import Any, Optional, Tuple
+
+import anyio
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.requests import Request
+
+BATCH_PATH = "/api/batch"
+
+
+def _decode_body(headers: dict, body: bytes) -> Any:
+    if not body:
+        return None
+    if headers.get("content-type", "").startswith("application/json"):
+        return json.loads(body)
+    return body.decode("utf-8", errors="replace")
+
+
+async def dispatch_subrequest(request: Request, method: str, path: str, body: Optional[Any]) -> Tuple[int, Any]:
+    """Run one sub-request through the app's router and return (status, body).
+
+    Bypasses the middleware stack, so the handler shares the batch request's
+    DB session (see db_session_middleware). Exceptions the handler doesn't turn
+    into a response propagate to the caller.
+    """
+    path, _, query_string = path.partition("?")
+    if not path.startswith("/"):
+        return 400, {"detail": "Batch paths must be absolute"}
+    if path.rstrip("/") == BATCH_PATH:
+        return 400, {"detail": "Batch requests cannot be nested"}
+
+    payload = json.dumps(body).encode() if body is not None else b""
+    headers = [(b"accept", b"application/json")]
+    if payload:
+        headers.append((b"content-type", b"application/json"))
+
+    scope = {
+        **request.scope,
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query_string.encode(),
+        "headers": headers,
+        "path_params": {},
+    }
+    for key in ("endpoint", "route"):
+        scope.pop(key, None)
+
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # Never disconnect: streaming responses would otherwise stop early
+        await anyio.sleep_forever()
+
+    status = 500
+    response_headers = {}
+    chunks = []
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = {
+                key.decode("latin-1").lower(): value.decode("latin-1")
+                for key, value in message.get("headers", [])
+            }
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await request.app.router(scope, receive, send)
+    except StarletteHTTPException as e:
+        # Router-level 404/405 are raised rather than rendered
+        return e.status_code, {"detail": e.detail}
+
+    return status, _decode_body(response_headers, b"".join(chunks))
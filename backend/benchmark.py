@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Request benchmark - CPU and wall time per request for the hot read endpoints
+Usage: python benchmark.py [requests_per_endpoint]
+
+Recreates BENCHMARK_DATABASE_URL (defaults to a fullstack_app_benchmark database)
+through the alembic migrations, so the numbers describe the partitioned schema.
+Runs once with server-side prepared statements disabled and once with
+DB_PREPARE_THRESHOLD. Each run times the hot queries with the legacy db.query
+code and with the lambda statements main.py uses, then times the endpoints.
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCHMARK_DATABASE_URL", "postgresql+psycopg://localhost:5432/fullstack_app_benchmark"
+)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, or_, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from database import DATABASE_URL, PREPARE_THRESHOLD, SessionLocal, run_migrations
+from models import User, Task
+from main import (TASK_FIELDS, app, filter_current_tasks, find_task, find_user, order_task_list,
+                  select_task_fields)
+from partitions import archive_cutoff, ensure_task_partitions
+from response_cache import response_cache
+
+USERS = 50
+TASKS_PER_USER = 20
+# Spread of created_at, so completed tasks land in the archive and monthly partitions
+SEED_MONTHS = 12
+WARMUP = 20
+
+ENDPOINTS = [
+    "/api/users",
+    "/api/users/1",
+    "/api/users/1/tasks",
+    "/api/tasks",
+    "/api/tasks?fields=title,completed",
+]
+
+def create_database():
+    url = make_url(DATABASE_URL)
+    admin_engine = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin_engine.connect() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": url.database}
+        ).first()
+        if not exists:
+            conn.execute(text(f'CREATE DATABASE "{url.database}"'))
+    admin_engine.dispose()
+
+def seed(engine):
+    """Rebuild the schema through the migrations, like production, and load test data"""
+
+    create_database()
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    run_migrations()
+
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        ensure_task_partitions(conn)
+        conn.execute(User.__table__.insert(), [
+            {"username": f"bench_{i}", "email": f"bench_{i}@example.com", "is_active": True}
+            for i in range(USERS)
+        ])
+        conn.execute(Task.__table__.insert(), [
+            {"title": f"Task {j}", "description": "x" * 500, "completed": j % 3 == 0, "user_id": i + 1,
+             "created_at": now - timedelta(days=j * SEED_MONTHS * 30 // TASKS_PER_USER)}
+            for i in range(USERS) for j in range(TASKS_PER_USER)
+        ])
+
+# The handlers' query code before lambda statements: db.query builds and compiles
+# a new statement on every call. Kept here as the baseline for the lambda versions
+
+def legacy_find_user(db, user_id):
+    return db.query(User).filter(User.id == user_id).first()
+
+def legacy_find_task(db, task_id):
+    return db.query(Task).filter(Task.id == task_id).first()
+
+def legacy_list_tasks(db, fields, cutoff, user_id=None):
+    query = db.query(*[getattr(Task, name) for name in fields])
+    if user_id is not None:
+        query = query.filter(Task.user_id == user_id)
+    query = query.filter(or_(Task.completed == False, Task.created_at >= cutoff))
+    return query.order_by(Task.completed, Task.created_at.desc()).all()
+
+def list_tasks(db, fields, cutoff, user_id=None):
+    stmt = select_task_fields(fields)
+    if user_id is not None:
+        stmt = stmt + (lambda s: s.where(Task.user_id == user_id))
+    return db.execute(order_task_list(filter_current_tasks(stmt, cutoff))).all()
+
+SPARSE_FIELDS = ("id", "title", "completed")
+
+QUERIES = [
+    ("find user", lambda db, cutoff: legacy_find_user(db, 1), lambda db, cutoff: find_user(db, 1)),
+    ("find task", lambda db, cutoff: legacy_find_task(db, 1), lambda db, cutoff: find_task(db, 1)),
+    ("list tasks", lambda db, cutoff: legacy_list_tasks(db, TASK_FIELDS, cutoff),
+     lambda db, cutoff: list_tasks(db, TASK_FIELDS, cutoff)),
+    ("list tasks (sparse)", lambda db, cutoff: legacy_list_tasks(db, SPARSE_FIELDS, cutoff),
+     lambda db, cutoff: list_tasks(db, SPARSE_FIELDS, cutoff)),
+    ("list user tasks", lambda db, cutoff: legacy_list_tasks(db, TASK_FIELDS, cutoff, user_id=1),
+     lambda db, cutoff: list_tasks(db, TASK_FIELDS, cutoff, user_id=1)),
+]
+
+def time_calls(call, requests):
+    for _ in range(WARMUP):
+        call()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(requests):
+        call()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return cpu / requests * 1000, wall / requests * 1000
+
+def measure_queries(engine, requests):
+    cutoff = archive_cutoff()
+    print(f"{'query':<40} {'legacy cpu':>12} {'lambda cpu':>12} {'legacy wall':>12} {'lambda wall':>12}")
+    with Session(engine) as db:
+        for name, legacy, current in QUERIES:
+            legacy_cpu, legacy_wall = time_calls(lambda: legacy(db, cutoff), requests)
+            lambda_cpu, lambda_wall = time_calls(lambda: current(db, cutoff), requests)
+            print(f"{name:<40} {legacy_cpu:>12.3f} {lambda_cpu:>12.3f} {legacy_wall:>12.3f} {lambda_wall:>12.3f}")
+
+def measure(client, path, requests):
+    # The response cache is emptied before every request (outside the timed
+    # part), so each one runs the queries instead of replaying a cached body
+    for _ in range(WARMUP):
+        response_cache.clear()
+        client.get(path)
+    cpu = wall = 0.0
+    for _ in range(requests):
+        response_cache.clear()
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        client.get(path)
+        cpu += time.process_time() - cpu_start
+        wall += time.perf_counter() - wall_start
+    return cpu / requests * 1000, wall / requests * 1000
+
+def run_benchmark(requests):
+    """Print per-request CPU/wall ms for the hot queries and endpoints, without and with prepared statements"""
+
+    client = TestClient(app)  # No lifespan: seed() has already migrated the benchmark DB
+    engines = {
+        "unprepared": create_engine(DATABASE_URL, connect_args={"prepare_threshold": None}),
+        f"prepare_threshold={PREPARE_THRESHOLD}": create_engine(
+            DATABASE_URL, connect_args={"prepare_threshold": PREPARE_THRESHOLD}
+        ),
+    }
+    seed(next(iter(engines.values())))
+
+    print(f"{requests} requests per query/endpoint, {USERS * TASKS_PER_USER} tasks (ms per request)")
+    for label, engine in engines.items():
+        SessionLocal.configure(bind=engine)
+        response_cache.clear()
+        print(f"\n{label}")
+        measure_queries(engine, requests)
+        print(f"\n{'endpoint':<40} {'cpu':>12} {'wall':>12}")
+        for path in ENDPOINTS:
+            cpu_ms, wall_ms = measure(client, path, requests)
+            print(f"{path:<40} {cpu_ms:>12.3f} {wall_ms:>12.3f}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
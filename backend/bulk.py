@@ -0,0 +1,144 @@
+import csv
+from typing import BinaryIO, Iterator
+
+import psycopg
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models import Task
+
+# Read/write size for streaming uploads into COPY FROM STDIN
+COPY_CHUNK_SIZE = 64 * 1024
+
+EXPORT_COLUMNS = "id, title, description, completed, user_id, created_at, updated_at"
+
+# Columns an import file may carry; id is accepted so exports round-trip, but ignored
+IMPORT_COLUMNS = ("id", "title", "description", "completed", "user_id", "created_at", "updated_at")
+REQUIRED_IMPORT_COLUMNS = ("title", "user_id")
+TITLE_MAX_LENGTH = Task.__table__.c.title.type.length
+
+# CSV quote/delimiter bytes that never occur in serialized JSON, so COPY passes
+# each JSON document through untouched (text format would escape backslashes)
+_RAW_LINE_OPTIONS = "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'"
+
+EXPORT_QUERIES = {
+    "csv": f"COPY (SELECT {EXPORT_COLUMNS} FROM tasks) TO STDOUT WITH (FORMAT csv, HEADER true)",
+    "ndjson": (
+        f"COPY (SELECT row_to_json(t) FROM (SELECT {EXPORT_COLUMNS} FROM tasks) t) "
+        f"TO STDOUT WITH ({_RAW_LINE_OPTIONS})"
+    ),
+}
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class TaskImportError(ValueError):
+    pass
+
+
+def stream_tasks_export(bind: Engine, fmt: str) -> Iterator[bytes]:
+    # Uses its own connection: the request session is closed by the middleware
+    # before the response body has finished streaming
+    with bind.connect() as conn:
+        cursor = conn.connection.driver_connection.cursor()
+        with cursor.copy(EXPORT_QUERIES[fmt]) as copy:
+            for chunk in copy:
+                yield bytes(chunk)
+
+
+def _copy_from_file(cursor, statement: str, fileobj: BinaryIO):
+    with cursor.copy(statement) as copy:
+        while chunk := fileobj.read(COPY_CHUNK_SIZE):
+            copy.write(chunk)
+
+
+def _read_csv_header(fileobj: BinaryIO) -> list:
+    # Bounded, so a file without newlines isn't read into memory whole
+    header_line = fileobj.readline(COPY_CHUNK_SIZE)
+    if len(header_line) == COPY_CHUNK_SIZE and not header_line.endswith(b"\n"):
+        raise TaskImportError(f"Import header line is longer than {COPY_CHUNK_SIZE} bytes")
+    try:
+        header_line = header_line.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise TaskImportError("Import header is not valid UTF-8")
+    columns = [column.strip() for column in next(csv.reader([header_line]), [])]
+    duplicates = sorted({column for column in columns if columns.count(column) > 1})
+    if duplicates:
+        raise TaskImportError(f"Duplicate columns in import: {', '.join(duplicates)}")
+    unknown = [column for column in columns if column not in IMPORT_COLUMNS]
+    if unknown:
+        raise TaskImportError(f"Unknown columns in import: {', '.join(unknown)}")
+    missing = [column for column in REQUIRED_IMPORT_COLUMNS if column not in columns]
+    if missing:
+        raise TaskImportError(f"Missing columns in import: {', '.join(missing)}")
+    return columns
+
+
+def copy_tasks_from_file(db: Session, fmt: str, fileobj: BinaryIO) -> int:
+    """Stream an uploaded CSV/NDJSON file into tasks via a COPY staging table.
+
+    Runs on the session's connection, so the insert commits or rolls back with
+    the request. Returns the number of imported tasks.
+    """
+    cursor = db.connection().connection.driver_connection.cursor()
+    cursor.execute(
+        "CREATE TEMP TABLE tasks_import ("
+        "id integer, title text, description text, completed boolean, "
+        "user_id integer, created_at timestamp, updated_at timestamp"
+        ") ON COMMIT DROP"
+    )
+
+    try:
+        if fmt == "csv":
+            columns = _read_csv_header(fileobj)
+            _copy_from_file(
+                cursor,
+                f"COPY tasks_import ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                fileobj,
+            )
+        else:
+            cursor.execute("CREATE TEMP TABLE tasks_import_lines (doc jsonb) ON COMMIT DROP")
+            _copy_from_file(
+                cursor,
+                f"COPY tasks_import_lines (doc) FROM STDIN WITH ({_RAW_LINE_OPTIONS})",
+                fileobj,
+            )
+            cursor.execute(
+                "INSERT INTO tasks_import "
+                "SELECT r.* FROM tasks_import_lines l, "
+                "jsonb_populate_record(NULL::tasks_import, l.doc) r "
+                "WHERE l.doc IS NOT NULL"
+            )
+            cursor.execute("DROP TABLE tasks_import_lines")
+
+        cursor.execute(
+            "SELECT count(*) FILTER (WHERE s.title IS NULL), "
+            "count(*) FILTER (WHERE length(s.title) > %s), "
+            "(array_agg(DISTINCT s.user_id) FILTER (WHERE u.id IS NULL))[1:10] "
+            "FROM tasks_import s LEFT JOIN users u ON u.id = s.user_id",
+            (TITLE_MAX_LENGTH,)
+        )
+        missing_titles, long_titles, unknown_user_ids = cursor.fetchone()
+        if missing_titles:
+            raise TaskImportError(f"{missing_titles} imported rows have no title")
+        if long_titles:
+            raise TaskImportError(f"{long_titles} imported rows have titles over {TITLE_MAX_LENGTH} characters")
+        if unknown_user_ids:
+            raise TaskImportError(f"Unknown user_id in import: {unknown_user_ids}")
+
+        cursor.execute(
+            "INSERT INTO tasks (title, description, completed, user_id, created_at, updated_at) "
+            "SELECT title, description, coalesce(completed, false), user_id, "
+            "coalesce(created_at, now() AT TIME ZONE 'utc'), "
+            "coalesce(updated_at, now() AT TIME ZONE 'utc') "
+            "FROM tasks_import"
+        )
+    except psycopg.DataError as e:
+        raise TaskImportError(f"Invalid import data: {e.diag.message_primary or e}")
+
+    imported = cursor.rowcount
+    cursor.execute("DROP TABLE tasks_import")
+    return imported
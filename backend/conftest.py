@@ -60,7 +60,8 @@ def client(test_db):
     from fastapi.middleware.cors import CORSMiddleware
     from main import (UserCreate, UserResponse, TaskCreate, TaskUpdate, TaskResponse,
                      create_user, get_users, get_user, create_task, get_tasks, 
-                     get_user_tasks, update_task, delete_task, read_root, health_check)
+                     get_user_tasks, update_task, delete_task, read_root, health_check,
+                     export_tasks, import_tasks, get_task, BatchResponse, batch)
     
     test_app = FastAPI(title="Test API")
     
@@ -73,14 +74,21 @@ def client(test_db):
         allow_headers=["*"],
     )
     
+    from compression import CompressionMiddleware
+    test_app.add_middleware(CompressionMiddleware)
+    
     # Add routes without database middleware
     test_app.get("/")(read_root)
     test_app.get("/api/health")(health_check)
+    test_app.post("/api/batch", response_model=BatchResponse)(batch)
     test_app.post("/api/users", response_model=UserResponse)(create_user)
     test_app.get("/api/users", response_model=list[UserResponse])(get_users)
     test_app.get("/api/users/{user_id}", response_model=UserResponse)(get_user)
     test_app.post("/api/tasks", response_model=TaskResponse)(create_task)
     test_app.get("/api/tasks", response_model=list[TaskResponse])(get_tasks)
+    test_app.get("/api/tasks/export")(export_tasks)
+    test_app.post("/api/tasks/import")(import_tasks)
+    test_app.get("/api/tasks/{task_id}", response_model=TaskResponse)(get_task)
     test_app.get("/api/users/{user_id}/tasks", response_model=list[TaskResponse])(get_user_tasks)
     test_app.put("/api/tasks/{task_id}", response_model=TaskResponse)(update_task)
     test_app.delete("/api/tasks/{task_id}")(delete_task)
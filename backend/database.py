@@ -9,7 +9,12 @@ load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql+psycopg://localhost:5432/fullstack_app')
 
-engine = create_engine(DATABASE_URL)
+# Executions of a statement before psycopg prepares it server side (0 = always);
+# "none" disables prepared statements, e.g. behind PgBouncer in transaction mode
+_prepare_threshold = os.getenv('DB_PREPARE_THRESHOLD', '1')
+PREPARE_THRESHOLD = None if _prepare_threshold.lower() == 'none' else int(_prepare_threshold)
+
+engine = create_engine(DATABASE_URL, connect_args={"prepare_threshold": PREPARE_THRESHOLD})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 metadata = MetaData()
 
@@ -1,11 +1,24 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Request, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, field_validator
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy import lambda_stmt, or_, select
+from typing import Any, List, Literal, Optional
 from contextlib import asynccontextmanager
+import logging
 
-from database import run_migrations, SessionLocal, db_session, get_db_session, test_connection
+from batch import dispatch_subrequest
+from bulk import EXPORT_MEDIA_TYPES, TaskImportError, copy_tasks_from_file, stream_tasks_export
+from compression import CompressionMiddleware, negotiate_encoding
+from database import engine, run_migrations, SessionLocal, db_session, get_db_session, test_connection
 from models import User, Task
+from partitions import archive_cutoff, ensure_task_partitions
+from response_cache import cached_json_response, get_table_versions
+
+TransferFormat = Literal["csv", "ndjson"]
+
+logger = logging.getLogger(__name__)
 
 
 class UserCreate(BaseModel):
@@ -42,11 +55,71 @@ class TaskResponse(BaseModel):
     completed: bool
     user_id: int
 
+class BatchOperation(BaseModel):
+    method: Literal["GET", "POST", "PUT", "DELETE"] = "GET"
+    path: str
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchOperation] = Field(max_length=50)
+    atomic: bool = False
+
+class BatchResult(BaseModel):
+    status: int
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+    rolled_back: bool = False
+
+TASK_FIELDS = tuple(TaskResponse.model_fields)
+
+
+def parse_task_fields(fields: Optional[str]) -> tuple:
+    # Sparse fieldset from ?fields=title,completed; id is always included
+    if fields is None:
+        return TASK_FIELDS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(TASK_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown task fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in TASK_FIELDS if name == "id" or name in requested)
+
+# Hot queries are lambda statements: SQLAlchemy caches them by the lambda's code
+# location (plus fieldset), skipping statement construction and compilation, and
+# the stable SQL lets psycopg reuse server-side prepared statements
+
+def find_user(db, user_id: int):
+    return db.execute(lambda_stmt(lambda: select(User).where(User.id == user_id))).scalar_one_or_none()
+
+def find_task(db, task_id: int):
+    return db.execute(lambda_stmt(lambda: select(Task).where(Task.id == task_id))).scalar_one_or_none()
+
+def select_task_fields(fields: tuple):
+    # Select only the requested columns so unused blobs (description) are never read
+    columns = [getattr(Task, name) for name in fields]
+    return lambda_stmt(lambda: select(*columns))
+
+def filter_current_tasks(stmt, cutoff):
+    # Open tasks plus recently created completed ones; lets Postgres prune the
+    # archive and older monthly partitions of tasks_completed
+    return stmt + (lambda s: s.where(or_(Task.completed == False, Task.created_at >= cutoff)))
+
+def order_task_list(stmt):
+    return stmt + (lambda s: s.order_by(Task.completed, Task.created_at.desc()))
+
+def list_task_rows(db, stmt, cutoff):
+    if cutoff is not None:
+        stmt = filter_current_tasks(stmt, cutoff)
+    return [row._asdict() for row in db.execute(order_task_list(stmt))]
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     test_connection()
     run_migrations()
+    with engine.begin() as conn:
+        ensure_task_partitions(conn)
     yield
 
 app = FastAPI(title="Full Stack App API", version="1.0.0", lifespan=lifespan)
@@ -73,6 +146,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
 @app.get("/")
 def read_root():
     return {"message": "Hello from FastAPI with PostgreSQL!"}
@@ -81,15 +156,47 @@ def read_root():
 def health_check():
     return {"status": "healthy", "database": "connected"}
 
+@app.post("/api/batch", response_model=BatchResponse)
+async def batch(batch_request: BatchRequest, request: Request):
+    # Sub-requests share this request's session; each runs in its own savepoint,
+    # or all of them in one savepoint when atomic (stopping at the first failure)
+    db = get_db_session()
+    results = []
+    if batch_request.atomic:
+        transaction = await run_in_threadpool(db.begin_nested)
+    
+    for operation in batch_request.requests:
+        if not batch_request.atomic:
+            transaction = await run_in_threadpool(db.begin_nested)
+        try:
+            status, body = await dispatch_subrequest(request, operation.method, operation.path, operation.body)
+        except Exception:
+            # An unhandled error fails only this sub-request, like a 500 would
+            logger.exception("Batch sub-request %s %s failed", operation.method, operation.path)
+            status, body = 500, {"detail": "Internal Server Error"}
+        results.append(BatchResult(status=status, body=body))
+        
+        if status >= 400:
+            await run_in_threadpool(transaction.rollback)
+            if batch_request.atomic:
+                return BatchResponse(results=results, rolled_back=True)
+        elif not batch_request.atomic:
+            await run_in_threadpool(transaction.commit)
+    
+    if batch_request.atomic:
+        await run_in_threadpool(transaction.commit)
+    return BatchResponse(results=results)
+
 # User endpoints
 @app.post("/api/users", response_model=UserResponse)
 def create_user(user: UserCreate):
     db = get_db_session()
     
     # Check for existing username
-    existing_user = db.query(User).filter(
-        (User.username == user.username) | (User.email == user.email)
-    ).first()
+    username, email = user.username, user.email
+    existing_user = db.execute(lambda_stmt(lambda: select(User).where(
+        (User.username == username) | (User.email == email)
+    ).limit(1))).scalar_one_or_none()
     if existing_user:
         if existing_user.username == user.username:
             raise HTTPException(status_code=400, detail="Username already exists")
@@ -108,20 +215,26 @@ def create_user(user: UserCreate):
     )
 
 @app.get("/api/users", response_model=List[UserResponse])
-def get_users():
+def get_users(accept_encoding: Optional[str] = Header(None)):
     db = get_db_session()
-    users = db.query(User).order_by(User.username).all()
-    return [UserResponse(
-        id=user.id,
-        username=user.username,
-        email=user.email,
-        is_active=user.is_active
-    ) for user in users]
+    
+    def build():
+        users = db.execute(lambda_stmt(lambda: select(User).order_by(User.username))).scalars().all()
+        return [UserResponse(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active
+        ) for user in users]
+    
+    return cached_json_response(
+        "users", get_table_versions(db, "users"), negotiate_encoding(accept_encoding), build
+    )
 
 @app.get("/api/users/{user_id}", response_model=UserResponse)
 def get_user(user_id: int):
     db = get_db_session()
-    user = db.query(User).filter(User.id == user_id).first()
+    user = find_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return UserResponse(
@@ -135,7 +248,7 @@ def get_user(user_id: int):
 @app.post("/api/tasks", response_model=TaskResponse)
 def create_task(task: TaskCreate):
     db = get_db_session()
-    user = db.query(User).filter(User.id == task.user_id).first()
+    user = find_user(db, task.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -156,37 +269,76 @@ def create_task(task: TaskCreate):
     )
 
 @app.get("/api/tasks", response_model=List[TaskResponse])
-def get_tasks():
+def get_tasks(fields: Optional[str] = None, include_archived: bool = False,
+              accept_encoding: Optional[str] = Header(None)):
     db = get_db_session()
-    tasks = db.query(Task).order_by(Task.completed, Task.created_at.desc()).all()
-    return [TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        completed=task.completed,
-        user_id=task.user_id
-    ) for task in tasks]
+    task_fields = parse_task_fields(fields)
+    cutoff = None if include_archived else archive_cutoff()
+    return cached_json_response(
+        ("tasks", task_fields, cutoff),
+        get_table_versions(db, "tasks"),
+        negotiate_encoding(accept_encoding),
+        lambda: list_task_rows(db, select_task_fields(task_fields), cutoff)
+    )
+
+@app.get("/api/tasks/export")
+def export_tasks(fmt: TransferFormat = Query("csv", alias="format")):
+    bind = get_db_session().get_bind()
+    return StreamingResponse(
+        stream_tasks_export(bind, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{fmt}"'}
+    )
+
+@app.post("/api/tasks/import")
+def import_tasks(file: UploadFile, fmt: TransferFormat = Query("csv", alias="format")):
+    db = get_db_session()
+    try:
+        with db.begin_nested():
+            imported = copy_tasks_from_file(db, fmt, file.file)
+    except TaskImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"imported": imported}
+
+@app.get("/api/tasks/{task_id}", response_model=TaskResponse)
+def get_task(task_id: int, fields: Optional[str] = None):
+    db = get_db_session()
+    task_fields = parse_task_fields(fields)
+    stmt = select_task_fields(task_fields) + (lambda s: s.where(Task.id == task_id))
+    task = db.execute(stmt).first()
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task_fields == TASK_FIELDS:
+        return TaskResponse(**task._asdict())
+    return JSONResponse(content=task._asdict())
 
 @app.get("/api/users/{user_id}/tasks", response_model=List[TaskResponse])
-def get_user_tasks(user_id: int):
+def get_user_tasks(user_id: int, fields: Optional[str] = None, include_archived: bool = False,
+                   accept_encoding: Optional[str] = Header(None)):
     db = get_db_session()
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    task_fields = parse_task_fields(fields)
+    cutoff = None if include_archived else archive_cutoff()
     
-    tasks = db.query(Task).filter(Task.user_id == user_id).order_by(Task.completed, Task.created_at.desc()).all()
-    return [TaskResponse(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        completed=task.completed,
-        user_id=task.user_id
-    ) for task in tasks]
+    def build():
+        # Only reached on a cache miss; a cached entry implies the user existed
+        # at the same users version
+        user = find_user(db, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        stmt = select_task_fields(task_fields) + (lambda s: s.where(Task.user_id == user_id))
+        return list_task_rows(db, stmt, cutoff)
+    
+    return cached_json_response(
+        ("user_tasks", user_id, task_fields, cutoff),
+        get_table_versions(db, "users", "tasks"),
+        negotiate_encoding(accept_encoding),
+        build
+    )
 
 @app.put("/api/tasks/{task_id}", response_model=TaskResponse)
 def update_task(task_id: int, task_update: TaskUpdate):
     db = get_db_session()
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = find_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -210,7 +362,7 @@ def update_task(task_id: int, task_update: TaskUpdate):
 @app.delete("/api/tasks/{task_id}")
 def delete_task(task_id: int):
     db = get_db_session()
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = find_task(db, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
@@ -0,0 +1,103 @@
+"""Partition tasks by completed and created_at
+
+Revision ID: 63a9bcc97952
+Revises: 8f17f3f94aa0
+Create Date: 2026-10-18 10:12:44.381520
+
+"""
+import os
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '63a9bcc97952'
+down_revision: Union[str, Sequence[str], None] = '8f17f3f94aa0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def archive_cutoff() -> datetime:
+    # Same rule as partitions.archive_cutoff, kept local so the migration stays frozen
+    months = int(os.getenv('TASK_ARCHIVE_AFTER_MONTHS', '3'))
+    now = datetime.utcnow()
+    index = now.year * 12 + now.month - 1 - months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE tasks RENAME TO tasks_unpartitioned")
+    op.execute("ALTER INDEX ix_tasks_id RENAME TO ix_tasks_unpartitioned_id")
+    op.execute("ALTER TABLE tasks_unpartitioned RENAME CONSTRAINT tasks_pkey TO tasks_unpartitioned_pkey")
+    op.execute(
+        "ALTER TABLE tasks_unpartitioned RENAME CONSTRAINT tasks_user_id_fkey TO tasks_unpartitioned_user_id_fkey"
+    )
+    op.execute("ALTER SEQUENCE tasks_id_seq OWNED BY NONE")
+
+    # The partition key has to be part of the primary key; its index also
+    # serves id lookups, so ix_tasks_id isn't recreated
+    op.execute("""
+        CREATE TABLE tasks (
+            id integer NOT NULL DEFAULT nextval('tasks_id_seq'),
+            title varchar(200) NOT NULL,
+            description text,
+            completed boolean NOT NULL DEFAULT false,
+            user_id integer NOT NULL CONSTRAINT tasks_user_id_fkey REFERENCES users (id),
+            created_at timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            updated_at timestamp,
+            PRIMARY KEY (id, completed, created_at)
+        ) PARTITION BY LIST (completed)
+    """)
+    op.execute("ALTER SEQUENCE tasks_id_seq OWNED BY tasks.id")
+    op.create_index('ix_tasks_completed_created_at', 'tasks', ['completed', sa.text('created_at DESC')], unique=False)
+
+    op.execute("CREATE TABLE tasks_open PARTITION OF tasks FOR VALUES IN (false)")
+    op.execute(
+        "CREATE TABLE tasks_completed PARTITION OF tasks FOR VALUES IN (true) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute(
+        "CREATE TABLE tasks_completed_archive PARTITION OF tasks_completed "
+        f"FOR VALUES FROM (MINVALUE) TO ('{archive_cutoff().isoformat()}')"
+    )
+    # Monthly partitions are created at startup (partitions.ensure_task_partitions),
+    # which moves recent rows out of the default partition
+    op.execute("CREATE TABLE tasks_completed_default PARTITION OF tasks_completed DEFAULT")
+
+    op.execute("""
+        INSERT INTO tasks (id, title, description, completed, user_id, created_at, updated_at)
+        SELECT id, title, description, coalesce(completed, false), user_id,
+               coalesce(created_at, now() AT TIME ZONE 'utc'), updated_at
+        FROM tasks_unpartitioned
+    """)
+    op.execute("DROP TABLE tasks_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('tasks_unpartitioned',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('tasks_id_seq')"), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('completed', sa.Boolean(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='tasks_user_id_fkey'),
+    sa.PrimaryKeyConstraint('id', name='tasks_unpartitioned_pkey')
+    )
+    op.execute("""
+        INSERT INTO tasks_unpartitioned (id, title, description, completed, user_id, created_at, updated_at)
+        SELECT id, title, description, completed, user_id, created_at, updated_at FROM tasks
+    """)
+    op.execute("ALTER SEQUENCE tasks_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE tasks")
+
+    op.execute("ALTER TABLE tasks_unpartitioned RENAME TO tasks")
+    op.execute("ALTER TABLE tasks RENAME CONSTRAINT tasks_unpartitioned_pkey TO tasks_pkey")
+    op.execute("ALTER SEQUENCE tasks_id_seq OWNED BY tasks.id")
+    op.create_index(op.f('ix_tasks_id'), 'tasks', ['id'], unique=False)
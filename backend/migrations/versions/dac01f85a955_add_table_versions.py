@@ -0,0 +1,60 @@
+"""Add table_versions and table_changes for response caching
+
+Revision ID: dac01f85a955
+Revises: 63a9bcc97952
+Create Date: 2026-10-18 14:37:09.528113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dac01f85a955'
+down_revision: Union[str, Sequence[str], None] = '63a9bcc97952'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('users', 'tasks')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.create_table('table_changes',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('xact_id', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Append-only: writers never update a shared row, so they don't serialize
+    op.execute("""
+        CREATE OR REPLACE FUNCTION record_table_change() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO table_changes (table_name, xact_id)
+            VALUES (TG_TABLE_NAME, pg_current_xact_id()::text::bigint);
+            RETURN NULL;
+        END
+        $$
+    """)
+    for name in VERSIONED_TABLES:
+        op.execute(f"INSERT INTO table_versions (table_name, version) VALUES ('{name}', 0)")
+        op.execute(
+            f"CREATE TRIGGER {name}_record_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {name} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION record_table_change()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {name}_record_change ON {name}")
+    op.execute("DROP FUNCTION record_table_change()")
+    op.drop_table('table_changes')
+    op.drop_table('table_versions')
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import (Column, Integer, BigInteger, String, Text, Boolean, DateTime, ForeignKey, Index,
+                        Table, DDL, event, text)
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -15,14 +16,63 @@ class User(Base):
     tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan")
 
 class Task(Base):
+    # In Postgres the table is partitioned by completed and created_at (see
+    # partitions.py), so its primary key is (id, completed, created_at)
     __tablename__ = 'tasks'
+    __table_args__ = (
+        Index('ix_tasks_completed_created_at', 'completed', text('created_at DESC')),
+    )
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
-    completed = Column(Boolean, default=False)
+    completed = Column(Boolean, default=False, nullable=False)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    user = relationship("User", back_populates="tasks")
\ No newline at end of file
+    user = relationship("User", back_populates="tasks")
+
+# Per-table versions for response caching. Statement-level triggers append a
+# row to table_changes on every write, so concurrent writers never contend on a
+# shared row. A table's version is its compacted count in table_versions plus
+# its rows in table_changes: every committed write raises it, and pruning
+# (response_cache.prune_table_changes) moves rows into the compacted count in
+# one transaction, leaving the sum unchanged.
+table_versions = Table(
+    'table_versions', Base.metadata,
+    Column('table_name', String(50), primary_key=True),
+    Column('version', BigInteger, nullable=False),
+)
+
+table_changes = Table(
+    'table_changes', Base.metadata,
+    Column('id', BigInteger, primary_key=True),
+    Column('table_name', String(50), nullable=False),
+    # Top-level transaction id of the writer, so a transaction can tell that a
+    # version includes its own uncommitted writes
+    Column('xact_id', BigInteger, nullable=False),
+)
+
+VERSIONED_TABLES = ('users', 'tasks')
+
+for ddl in [
+    DDL("""
+        CREATE OR REPLACE FUNCTION record_table_change() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO table_changes (table_name, xact_id)
+            VALUES (TG_TABLE_NAME, pg_current_xact_id()::text::bigint);
+            RETURN NULL;
+        END
+        $$
+    """),
+    *[DDL(
+        f"INSERT INTO table_versions (table_name, version) VALUES ('{name}', 0) "
+        f"ON CONFLICT (table_name) DO NOTHING"
+    ) for name in VERSIONED_TABLES],
+    *[DDL(
+        f"CREATE OR REPLACE TRIGGER {name}_record_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {name} "
+        f"FOR EACH STATEMENT EXECUTE FUNCTION record_table_change()"
+    ) for name in VERSIONED_TABLES],
+]:
+    event.listen(Base.metadata, 'after_create', ddl.execute_if(dialect='postgresql'))
@@ -0,0 +1,153 @@
+"""
+Maintenance for the partitioned tasks table.
+
+tasks is LIST partitioned on completed: open tasks live in tasks_open, completed
+ones in tasks_completed, which is RANGE partitioned by created_at into monthly
+partitions (tasks_completed_pYYYY_MM), a cold tasks_completed_archive covering
+everything before the archive cutoff, and a default partition as a safety net.
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+# Completed tasks created before the start of the month this many months ago are archived
+ARCHIVE_AFTER_MONTHS = int(os.getenv('TASK_ARCHIVE_AFTER_MONTHS', '3'))
+# How many future monthly partitions to keep ready
+PARTITIONS_AHEAD_MONTHS = int(os.getenv('TASK_PARTITIONS_AHEAD_MONTHS', '3'))
+
+# CHECK constraint that lets ATTACH of the widened archive skip its validation scan
+ARCHIVE_CHECK = 'tasks_completed_archive_cutoff'
+# Key for pg_advisory_xact_lock, serializing partition maintenance across workers
+PARTITION_LOCK_KEY = 7310242
+
+MONTHLY_PARTITION = re.compile(r'^tasks_completed_p(\d{4})_(\d{2})$')
+RANGE_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(value: datetime, offset: int = 0) -> datetime:
+    index = value.year * 12 + value.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def archive_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Oldest created_at still served by default task listings"""
+    return month_start(now or datetime.utcnow(), -ARCHIVE_AFTER_MONTHS)
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('tasks_completed')"
+    )).first() is not None
+
+
+def archive_upper_bound(conn: Connection) -> datetime:
+    bound = conn.execute(text(
+        "SELECT pg_get_expr(relpartbound, oid) FROM pg_class "
+        "WHERE oid = 'tasks_completed_archive'::regclass"
+    )).scalar_one()
+    return datetime.fromisoformat(RANGE_UPPER_BOUND.search(bound).group(1))
+
+
+def monthly_partitions(conn: Connection) -> dict:
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'tasks_completed'::regclass"
+    )).scalars()
+    partitions = {}
+    for name in rows:
+        match = MONTHLY_PARTITION.match(name)
+        if match:
+            partitions[datetime(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def _lock_partitions(conn: Connection):
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+
+
+def _move_from_default(conn: Connection, target: str, condition: str, **params) -> int:
+    result = conn.execute(text(
+        f"WITH moved AS (DELETE FROM tasks_completed_default WHERE {condition} RETURNING *) "
+        f"INSERT INTO {target} SELECT * FROM moved"
+    ), params)
+    return result.rowcount
+
+
+def ensure_task_partitions(conn: Connection, now: Optional[datetime] = None) -> list:
+    """Create missing monthly partitions from the archive bound to PARTITIONS_AHEAD_MONTHS ahead.
+
+    Rows that already landed in the default partition are moved into the new
+    partition before it is attached. Holds an advisory lock until the caller's
+    transaction ends, so workers starting together don't race on CREATE TABLE.
+    Returns the names of created partitions.
+    """
+    if not is_partitioned(conn):
+        return []
+
+    _lock_partitions(conn)
+    now = now or datetime.utcnow()
+    existing = monthly_partitions(conn)
+    start = archive_upper_bound(conn)
+    created = []
+    while start < month_start(now, PARTITIONS_AHEAD_MONTHS + 1):
+        end = month_start(start, 1)
+        if start not in existing:
+            name = f"tasks_completed_p{start:%Y_%m}"
+            conn.execute(text(f"CREATE TABLE {name} (LIKE tasks INCLUDING DEFAULTS)"))
+            _move_from_default(conn, name, "created_at >= :start AND created_at < :end", start=start, end=end)
+            conn.execute(text(
+                f"ALTER TABLE tasks_completed ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            created.append(name)
+        start = end
+    return created
+
+
+def archive_completed_tasks(bind: Engine, now: Optional[datetime] = None) -> int:
+    """Fold monthly partitions older than the archive cutoff into tasks_completed_archive.
+
+    The archive is detached while its range is extended, which locks
+    tasks_completed exclusively. To keep that window short, a CHECK constraint
+    proving the new range is validated first, in separate transactions that
+    don't block task reads or writes, so the re-ATTACH skips scanning the
+    archive. Returns the number of tasks moved.
+    """
+    with bind.begin() as conn:
+        if not is_partitioned(conn):
+            return 0
+        cutoff = archive_cutoff(now)
+        if cutoff <= archive_upper_bound(conn):
+            return 0
+        conn.execute(text(f"ALTER TABLE tasks_completed_archive DROP CONSTRAINT IF EXISTS {ARCHIVE_CHECK}"))
+        conn.execute(text(
+            f"ALTER TABLE tasks_completed_archive ADD CONSTRAINT {ARCHIVE_CHECK} "
+            f"CHECK (created_at < '{cutoff.isoformat()}') NOT VALID"
+        ))
+
+    with bind.begin() as conn:
+        conn.execute(text(f"ALTER TABLE tasks_completed_archive VALIDATE CONSTRAINT {ARCHIVE_CHECK}"))
+
+    with bind.begin() as conn:
+        _lock_partitions(conn)
+        moved = 0
+        if cutoff > archive_upper_bound(conn):
+            conn.execute(text("ALTER TABLE tasks_completed DETACH PARTITION tasks_completed_archive"))
+            for start, name in sorted(monthly_partitions(conn).items()):
+                if start >= cutoff:
+                    continue
+                conn.execute(text(f"ALTER TABLE tasks_completed DETACH PARTITION {name}"))
+                moved += conn.execute(text(f"INSERT INTO tasks_completed_archive SELECT * FROM {name}")).rowcount
+                conn.execute(text(f"DROP TABLE {name}"))
+            moved += _move_from_default(conn, "tasks_completed_archive", "created_at < :cutoff", cutoff=cutoff)
+            conn.execute(text(
+                "ALTER TABLE tasks_completed ATTACH PARTITION tasks_completed_archive "
+                f"FOR VALUES FROM (MINVALUE) TO ('{cutoff.isoformat()}')"
+            ))
+        conn.execute(text(f"ALTER TABLE tasks_completed_archive DROP CONSTRAINT {ARCHIVE_CHECK}"))
+    return moved
@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import Response
+from pydantic_core import to_json
+from sqlalchemy import text
+
+from compression import COMPRESSION_MIN_SIZE, IDENTITY, compress
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Pending table_changes rows before a reader folds them into table_versions
+TABLE_CHANGES_PRUNE_THRESHOLD = int(os.getenv('TABLE_CHANGES_PRUNE_THRESHOLD', '1000'))
+
+# Arbitrary key for pg_try_advisory_xact_lock, so only one pruner runs at a time
+PRUNE_LOCK_KEY = 7310241
+
+TABLE_VERSIONS_QUERY = text("""
+    SELECT v.table_name,
+           v.version + count(c.id),
+           count(c.id),
+           coalesce(bool_or(c.xact_id = pg_current_xact_id_if_assigned()::text::bigint), false)
+    FROM table_versions v
+    LEFT JOIN table_changes c ON c.table_name = v.table_name
+    GROUP BY v.table_name, v.version
+""")
+
+PRUNE_TABLE_CHANGES = text("""
+    WITH pruned AS (DELETE FROM table_changes RETURNING table_name)
+    UPDATE table_versions v SET version = v.version + p.changes
+    FROM (SELECT table_name, count(*) AS changes FROM pruned GROUP BY table_name) p
+    WHERE v.table_name = p.table_name
+""")
+
+
+class ResponseCache:
+    """Thread-safe LRU of encoded response bodies, bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, body: bytes, encoding: str):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self._entries[key] = (body, encoding)
+            self.size += len(body)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+response_cache = ResponseCache()
+
+
+def prune_table_changes(bind):
+    """Fold committed table_changes rows into table_versions, on its own connection"""
+    with bind.begin() as conn:
+        if conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PRUNE_LOCK_KEY}).scalar():
+            conn.execute(PRUNE_TABLE_CHANGES)
+
+
+def get_table_versions(db, *tables: str) -> tuple:
+    """Current versions of tables (see models.py); None where not cacheable.
+
+    A version that includes this transaction's own uncommitted writes is
+    reported as None: if the transaction rolled back, a later commit could
+    reach the same number with different data.
+    """
+    versions, pending = {}, 0
+    for table_name, version, changes, own_writes in db.execute(TABLE_VERSIONS_QUERY):
+        versions[table_name] = None if own_writes else version
+        pending += changes
+    if pending > TABLE_CHANGES_PRUNE_THRESHOLD:
+        prune_table_changes(db.get_bind())
+    return tuple(versions.get(table) for table in tables)
+
+
+def cached_json_response(key: Hashable, versions: tuple, encoding: str, build: Callable[[], Any]) -> Response:
+    """Serve build()'s JSON from the cache, encoding and storing it on a miss.
+
+    key identifies the request (endpoint and parameters) and versions the state
+    of the tables it reads; without versions the response is never cached.
+    """
+    cacheable = None not in versions
+    cache_key = (key, versions, encoding)
+    entry = response_cache.get(cache_key) if cacheable else None
+    if entry is None:
+        body, content_encoding = to_json(build()), IDENTITY
+        if encoding != IDENTITY and len(body) >= COMPRESSION_MIN_SIZE:
+            body, content_encoding = compress(body, encoding), encoding
+        if cacheable:
+            response_cache.put(cache_key, body, content_encoding)
+    else:
+        body, content_encoding = entry
+
+    headers = {"Vary": "Accept-Encoding"}
+    if content_encoding != IDENTITY:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, media_type="application/json", headers=headers)
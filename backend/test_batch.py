@@ -0,0 +1,89 @@
+import pytest
+
+def test_batch_initial_load(client, sample_user):
+    client.post("/api/tasks", json={"title": "Task 1", "user_id": sample_user["id"]})
+    
+    response = client.post("/api/batch", json={"requests": [
+        {"path": "/"},
+        {"path": "/api/health"},
+        {"path": "/api/users"},
+        {"path": "/api/tasks?fields=title"},
+    ]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [200, 200, 200, 200]
+    assert results[1]["body"]["status"] == "healthy"
+    assert results[2]["body"][0]["username"] == sample_user["username"]
+    assert results[3]["body"] == [{"id": 1, "title": "Task 1"}]
+
+def test_batch_mutation_then_read(client, sample_user):
+    response = client.post("/api/batch", json={"requests": [
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "New Task", "user_id": sample_user["id"]}},
+        {"path": "/api/tasks"},
+    ]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["status"] == 200
+    assert [task["title"] for task in results[1]["body"]] == ["New Task"]
+
+def test_batch_errors_are_per_request(client, sample_user):
+    response = client.post("/api/batch", json={"requests": [
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "Kept", "user_id": sample_user["id"]}},
+        {"method": "PUT", "path": "/api/tasks/999", "body": {"completed": True}},
+        {"path": "/api/nowhere"},
+        {"method": "POST", "path": "/api/tasks", "body": {"user_id": sample_user["id"]}},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == [200, 404, 404, 422]
+    assert data["results"][1]["body"]["detail"] == "Task not found"
+    assert data["rolled_back"] == False
+    assert len(client.get("/api/tasks").json()) == 1
+
+def test_batch_atomic_rolls_back(client, sample_user):
+    response = client.post("/api/batch", json={"atomic": True, "requests": [
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "Discarded", "user_id": sample_user["id"]}},
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "Bad", "user_id": 999}},
+        {"path": "/api/tasks"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == [200, 404]
+    assert data["rolled_back"] == True
+    assert client.get("/api/tasks").json() == []
+
+def test_batch_cannot_nest(client):
+    response = client.post("/api/batch", json={"requests": [
+        {"method": "POST", "path": "/api/batch", "body": {"requests": []}},
+    ]})
+    assert response.json()["results"][0]["status"] == 400
+
+def test_batch_unhandled_error_fails_only_that_request(client, sample_user):
+    # A title over 200 characters raises a DataError from the insert
+    response = client.post("/api/batch", json={"requests": [
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "Kept", "user_id": sample_user["id"]}},
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "x" * 300, "user_id": sample_user["id"]}},
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "Also kept", "user_id": sample_user["id"]}},
+    ]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [200, 500, 200]
+    assert results[1]["body"] == {"detail": "Internal Server Error"}
+    assert {task["title"] for task in client.get("/api/tasks").json()} == {"Kept", "Also kept"}
+
+def test_batch_atomic_unhandled_error(client, sample_user, monkeypatch):
+    import main
+    def broken_find_task(db, task_id):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(main, "find_task", broken_find_task)
+    
+    response = client.post("/api/batch", json={"atomic": True, "requests": [
+        {"method": "POST", "path": "/api/tasks", "body": {"title": "Discarded", "user_id": sample_user["id"]}},
+        {"method": "PUT", "path": "/api/tasks/1", "body": {"completed": True}},
+        {"path": "/api/tasks"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == [200, 500]
+    assert data["rolled_back"] == True
+    assert client.get("/api/tasks").json() == []
@@ -0,0 +1,164 @@
+import pytest
+from compression import IDENTITY, negotiate_encoding
+from response_cache import ResponseCache, response_cache
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0.5, br") == "br"
+    assert negotiate_encoding("gzip, br;q=0") == "gzip"
+    assert negotiate_encoding("deflate") == IDENTITY
+    assert negotiate_encoding("") == IDENTITY
+    assert negotiate_encoding(None) == IDENTITY
+    assert negotiate_encoding("*") in ("zstd", "br", "gzip")
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, max_bytes=100)
+    cache.put("a", b"1", IDENTITY)
+    cache.put("b", b"2", IDENTITY)
+    cache.get("a")
+    cache.put("c", b"3", IDENTITY)
+    assert cache.get("b") is None
+    assert cache.get("a") == (b"1", IDENTITY)
+    
+    cache.put("big", b"x" * 99, IDENTITY)
+    assert cache.size <= 100
+    assert cache.get("big") is not None
+    cache.put("huge", b"x" * 101, IDENTITY)
+    assert cache.get("huge") is None
+
+def test_large_list_is_compressed(client, sample_user):
+    for i in range(10):
+        client.post("/api/tasks", json={"title": f"Task {i}", "description": "x" * 500, "user_id": sample_user["id"]})
+    
+    response = client.get("/api/tasks", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 10
+    
+    response = client.get("/api/tasks", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert len(response.json()) == 10
+
+def test_small_response_is_not_compressed(client):
+    response = client.get("/api/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json()["status"] == "healthy"
+
+def test_list_reflects_uncommitted_writes(client, sample_user):
+    # The client's session never commits, so these responses bypass the cache
+    response_cache.clear()
+    user_id = sample_user["id"]
+    client.post("/api/tasks", json={"title": "First", "user_id": user_id})
+    assert [task["title"] for task in client.get("/api/tasks").json()] == ["First"]
+    assert [task["title"] for task in client.get("/api/tasks").json()] == ["First"]
+    
+    task_id = client.post("/api/tasks", json={"title": "Second", "user_id": user_id}).json()["id"]
+    assert len(client.get("/api/tasks").json()) == 2
+    
+    client.put(f"/api/tasks/{task_id}", json={"title": "Renamed"})
+    titles = {task["title"] for task in client.get(f"/api/users/{user_id}/tasks").json()}
+    assert titles == {"First", "Renamed"}
+    
+    client.delete(f"/api/tasks/{task_id}")
+    assert [task["title"] for task in client.get("/api/tasks").json()] == ["First"]
+    assert response_cache.size == 0
+
+def test_cached_list_hits_and_invalidates(client, test_engine, test_db, sample_user, monkeypatch):
+    from datetime import datetime
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    import main
+    
+    builds = []
+    list_task_rows = main.list_task_rows
+    def counting_list_task_rows(*args):
+        builds.append(args)
+        return list_task_rows(*args)
+    monkeypatch.setattr(main, "list_task_rows", counting_list_task_rows)
+    response_cache.clear()
+    
+    user_id = sample_user["id"]
+    client.post("/api/tasks", json={"title": "First", "user_id": user_id})
+    test_db.commit()
+    
+    def titles():
+        return sorted(task["title"] for task in client.get("/api/tasks").json())
+    
+    assert titles() == ["First"]
+    assert len(builds) == 1
+    assert titles() == ["First"]
+    assert len(builds) == 1  # Served from the cache
+    
+    # Committed writes from another connection invalidate the cached list
+    with Session(test_engine) as other:
+        task_id = other.execute(
+            text("INSERT INTO tasks (title, completed, user_id, created_at) "
+                 "VALUES ('Second', false, :user_id, :created_at) RETURNING id"),
+            {"user_id": user_id, "created_at": datetime.utcnow()}
+        ).scalar()
+        other.commit()
+    assert titles() == ["First", "Second"]
+    assert len(builds) == 2
+    
+    with Session(test_engine) as other:
+        other.execute(text("UPDATE tasks SET title = 'Renamed' WHERE id = :id"), {"id": task_id})
+        other.commit()
+    assert titles() == ["First", "Renamed"]
+    
+    with Session(test_engine) as other:
+        other.execute(text("DELETE FROM tasks WHERE id = :id"), {"id": task_id})
+        other.commit()
+    assert titles() == ["First"]
+    assert titles() == ["First"]
+    assert len(builds) == 4
+
+def test_concurrent_writers_do_not_block(test_engine, test_db):
+    from datetime import datetime
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from response_cache import get_table_versions
+    
+    insert_user = text("INSERT INTO users (username, email, is_active) VALUES (:name, :name, true) RETURNING id")
+    insert_task = text(
+        "INSERT INTO tasks (title, completed, user_id, created_at) VALUES ('Task', false, :user_id, :created_at)"
+    )
+    with Session(test_engine) as session:
+        owner_id = session.execute(insert_user, {"name": "owner"}).scalar()
+        session.commit()
+        before = get_table_versions(session, "users", "tasks")
+    
+    first, second = Session(test_engine), Session(test_engine)
+    try:
+        for session in (first, second):
+            session.execute(text("SET LOCAL lock_timeout = '2s'"))
+        # Opposite write orders, interleaved: a shared version row would block here
+        first.execute(insert_user, {"name": "first"})
+        second.execute(insert_task, {"user_id": owner_id, "created_at": datetime.utcnow()})
+        first.execute(insert_task, {"user_id": owner_id, "created_at": datetime.utcnow()})
+        second.execute(insert_user, {"name": "second"})
+        
+        # A transaction's own uncommitted writes make its versions uncacheable
+        assert get_table_versions(first, "users", "tasks") == (None, None)
+        first.commit()
+        second.commit()
+    finally:
+        first.close()
+        second.close()
+    
+    with Session(test_engine) as session:
+        after = get_table_versions(session, "users", "tasks")
+    assert after[0] == before[0] + 2
+    assert after[1] == before[1] + 2
+
+def test_truncate_changes_table_version(test_engine, test_db):
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from response_cache import get_table_versions
+    
+    with Session(test_engine) as session:
+        before = get_table_versions(session, "tasks")
+        session.commit()
+        session.execute(text("TRUNCATE tasks"))
+        session.commit()
+        assert get_table_versions(session, "tasks")[0] == before[0] + 1
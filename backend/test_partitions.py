@@ -0,0 +1,195 @@
+import pytest
+import importlib.util
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from conftest import TEST_DATABASE_URL
+from database import db_session
+from partitions import (ARCHIVE_AFTER_MONTHS, PARTITIONS_AHEAD_MONTHS, archive_completed_tasks,
+                        archive_cutoff, archive_upper_bound, ensure_task_partitions, month_start)
+
+SCHEMA = "partition_test"
+MIGRATIONS = Path(__file__).parent / "migrations" / "versions"
+
+
+def run_migration(conn, filename):
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    spec = importlib.util.spec_from_file_location(filename, MIGRATIONS / filename)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with Operations.context(MigrationContext.configure(conn)):
+        migration.upgrade()
+
+@pytest.fixture(scope="function")
+def partitioned_engine(test_engine):
+    # Builds the real migrated layout in its own schema, leaving the test
+    # database's plain tables alone
+    with test_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+
+    with engine.begin() as conn:
+        run_migration(conn, "8f17f3f94aa0_create_users_and_tasks_tables.py")
+        conn.execute(text("INSERT INTO users (id, username, email, is_active) VALUES (1, 'owner', 'owner@example.com', true)"))
+    yield engine
+
+    engine.dispose()
+    with test_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+@pytest.fixture(scope="function")
+def test_db(partitioned_engine):
+    # Overrides conftest's test_db, so the client fixture's handlers run on the
+    # fully migrated, partitioned schema
+    with partitioned_engine.begin() as conn:
+        run_migration(conn, "63a9bcc97952_partition_tasks_by_completed_and_created_at.py")
+        run_migration(conn, "dac01f85a955_add_table_versions.py")
+        ensure_task_partitions(conn)
+    
+    session = sessionmaker(autocommit=False, autoflush=False, bind=partitioned_engine)()
+    token = db_session.set(session)
+    
+    yield session
+    
+    session.close()
+    db_session.reset(token)
+
+def add_task(conn, title, completed, created_at):
+    conn.execute(
+        text("INSERT INTO tasks (title, completed, user_id, created_at) VALUES (:title, :completed, 1, :created_at)"),
+        {"title": title, "completed": completed, "created_at": created_at}
+    )
+
+def task_locations(conn):
+    rows = conn.execute(text("SELECT title, tableoid::regclass::text FROM tasks"))
+    return dict(rows.all())
+
+def completed_partitions(conn):
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'tasks_completed'::regclass ORDER BY c.relname"
+    ))
+    return rows.scalars().all()
+
+def test_partition_migration_and_maintenance(partitioned_engine):
+    migrated_at = datetime.utcnow()
+    bound = archive_cutoff(migrated_at)
+    with partitioned_engine.begin() as conn:
+        add_task(conn, "Old open", False, bound - timedelta(days=400))
+        add_task(conn, "Old done", True, bound - timedelta(days=1))
+        add_task(conn, "Recent done", True, bound + timedelta(days=5))
+        run_migration(conn, "63a9bcc97952_partition_tasks_by_completed_and_created_at.py")
+
+    # A fixed "now" relative to the bound the migration chose
+    now = month_start(bound, ARCHIVE_AFTER_MONTHS) + timedelta(days=14)
+    with partitioned_engine.begin() as conn:
+        constraints = conn.execute(text(
+            "SELECT conname FROM pg_constraint WHERE conrelid = 'tasks'::regclass ORDER BY conname"
+        )).scalars().all()
+        assert constraints == ["tasks_pkey", "tasks_user_id_fkey"]
+        indexes = conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = 'tasks' "
+            "ORDER BY indexname"
+        )).scalars().all()
+        assert indexes == ["ix_tasks_completed_created_at", "tasks_pkey"]
+
+        assert archive_upper_bound(conn) == bound
+        assert task_locations(conn) == {
+            "Old open": "tasks_open",
+            "Old done": "tasks_completed_archive",
+            "Recent done": "tasks_completed_default",
+        }
+
+        created = ensure_task_partitions(conn, now=now)
+        months = range(ARCHIVE_AFTER_MONTHS + PARTITIONS_AHEAD_MONTHS + 1)
+        assert created == [f"tasks_completed_p{month_start(bound, i):%Y_%m}" for i in months]
+        assert ensure_task_partitions(conn, now=now) == []
+        assert task_locations(conn)["Recent done"] == f"tasks_completed_p{bound:%Y_%m}"
+
+        add_task(conn, "Next month done", True, month_start(bound, 1) + timedelta(days=3))
+        add_task(conn, "Current done", True, month_start(bound, 2))
+        conn.execute(text("UPDATE tasks SET completed = true WHERE title = 'Old open'"))
+        assert task_locations(conn)["Old open"] == "tasks_completed_archive"
+
+    later = month_start(now, 2) + timedelta(days=14)
+    new_cutoff = month_start(bound, 2)
+    assert archive_cutoff(later) == new_cutoff
+    assert archive_completed_tasks(partitioned_engine, now=later) == 2
+    assert archive_completed_tasks(partitioned_engine, now=later) == 0
+
+    with partitioned_engine.begin() as conn:
+        assert archive_upper_bound(conn) == new_cutoff
+        locations = task_locations(conn)
+        assert locations["Recent done"] == "tasks_completed_archive"
+        assert locations["Next month done"] == "tasks_completed_archive"
+        assert locations["Current done"] == f"tasks_completed_p{new_cutoff:%Y_%m}"
+
+        partitions = completed_partitions(conn)
+        assert f"tasks_completed_p{bound:%Y_%m}" not in partitions
+        assert f"tasks_completed_p{month_start(bound, 1):%Y_%m}" not in partitions
+        assert f"tasks_completed_p{new_cutoff:%Y_%m}" in partitions
+        assert {"tasks_completed_archive", "tasks_completed_default"} <= set(partitions)
+
+        leftover_checks = conn.execute(text(
+            "SELECT count(*) FROM pg_constraint "
+            "WHERE conrelid = 'tasks_completed_archive'::regclass AND contype = 'c'"
+        )).scalar()
+        assert leftover_checks == 0
+
+def test_ensure_task_partitions_concurrently(partitioned_engine):
+    with partitioned_engine.begin() as conn:
+        run_migration(conn, "63a9bcc97952_partition_tasks_by_completed_and_created_at.py")
+
+    now = datetime.utcnow()
+    results, errors = [], []
+
+    def worker():
+        try:
+            with partitioned_engine.begin() as conn:
+                results.append(ensure_task_partitions(conn, now=now))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # One worker created everything; the other found it already there
+    assert sorted(len(created) for created in results)[0] == 0
+    assert len(results) == 2
+
+def test_task_handlers_on_partitioned_layout(client, test_db):
+    # The partitioned_engine fixture created user 1
+    task_id = client.post("/api/tasks", json={"title": "Toggle", "user_id": 1}).json()["id"]
+    add_task(test_db, "Archived", True, archive_cutoff() - timedelta(days=30))
+    assert task_locations(test_db) == {"Toggle": "tasks_open", "Archived": "tasks_completed_archive"}
+    
+    # Completing a task moves its row into the current monthly partition
+    response = client.put(f"/api/tasks/{task_id}", json={"completed": True})
+    assert response.status_code == 200
+    assert response.json()["completed"] == True
+    current_partition = f"tasks_completed_p{month_start(datetime.utcnow()):%Y_%m}"
+    assert task_locations(test_db)["Toggle"] == current_partition
+    
+    # Default listings skip the archive partition
+    assert [task["title"] for task in client.get("/api/tasks").json()] == ["Toggle"]
+    assert [task["title"] for task in client.get("/api/users/1/tasks?fields=title").json()] == ["Toggle"]
+    archived = client.get("/api/tasks?include_archived=true").json()
+    assert {task["title"] for task in archived} == {"Toggle", "Archived"}
+    assert client.get(f"/api/tasks/{task_id}").json()["completed"] == True
+    
+    assert client.put(f"/api/tasks/{task_id}", json={"completed": False}).status_code == 200
+    assert task_locations(test_db)["Toggle"] == "tasks_open"
+    
+    response = client.delete(f"/api/tasks/{task_id}")
+    assert response.status_code == 200
+    assert task_locations(test_db) == {"Archived": "tasks_completed_archive"}
+    assert client.get("/api/tasks").json() == []
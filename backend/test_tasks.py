@@ -145,4 +145,164 @@ def test_delete_task(client, sample_user):
 def test_delete_task_not_found(client):
     response = client.delete("/api/tasks/999")
     assert response.status_code == 404
-    assert response.json()["detail"] == "Task not found"
\ No newline at end of file
+    assert response.json()["detail"] == "Task not found"
+
+def test_export_tasks_csv(client, test_db, sample_user):
+    user_id = sample_user["id"]
+    client.post("/api/tasks", json={"title": "Task 1", "description": "a, \"quoted\" value", "user_id": user_id})
+    client.post("/api/tasks", json={"title": "Task 2", "user_id": user_id})
+    test_db.commit()  # Export streams over its own connection
+    
+    response = client.get("/api/tasks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,title,description,completed,user_id,created_at,updated_at"
+    assert len(lines) == 3
+
+def test_export_tasks_ndjson(client, test_db, sample_user):
+    import json
+    user_id = sample_user["id"]
+    client.post("/api/tasks", json={"title": "Task 1", "description": "back\\slash\nnewline", "user_id": user_id})
+    test_db.commit()
+    
+    response = client.get("/api/tasks/export?format=ndjson")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 1
+    assert rows[0]["description"] == "back\\slash\nnewline"
+    assert rows[0]["user_id"] == user_id
+
+def test_import_tasks_csv(client, sample_user):
+    user_id = sample_user["id"]
+    content = f"title,description,user_id\nImported 1,,{user_id}\nImported 2,\"with, comma\",{user_id}\n"
+    response = client.post("/api/tasks/import", files={"file": ("tasks.csv", content, "text/csv")})
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+    
+    tasks = client.get("/api/tasks").json()
+    assert {task["title"] for task in tasks} == {"Imported 1", "Imported 2"}
+
+def test_import_tasks_ndjson(client, sample_user):
+    user_id = sample_user["id"]
+    content = (
+        f'{{"title": "Imported", "completed": true, "user_id": {user_id}}}\n'
+        f'{{"title": "Second", "description": "back\\\\slash", "user_id": {user_id}}}\n'
+    )
+    response = client.post("/api/tasks/import?format=ndjson", files={"file": ("tasks.ndjson", content)})
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+    
+    tasks = {task["title"]: task for task in client.get("/api/tasks").json()}
+    assert tasks["Imported"]["completed"] == True
+    assert tasks["Second"]["description"] == "back\\slash"
+
+def test_import_tasks_unknown_user(client, sample_user):
+    content = f"title,user_id\nGood,{sample_user['id']}\nBad,999\n"
+    response = client.post("/api/tasks/import", files={"file": ("tasks.csv", content)})
+    assert response.status_code == 400
+    assert "999" in response.json()["detail"]
+    assert client.get("/api/tasks").json() == []
+
+def test_import_tasks_unknown_column(client):
+    response = client.post("/api/tasks/import", files={"file": ("tasks.csv", "title,owner\nTask,1\n")})
+    assert response.status_code == 400
+
+def test_import_tasks_duplicate_column(client, sample_user):
+    content = f"title,user_id,title\nTask,{sample_user['id']},Again\n"
+    response = client.post("/api/tasks/import", files={"file": ("tasks.csv", content)})
+    assert response.status_code == 400
+    assert "title" in response.json()["detail"]
+
+def test_import_tasks_invalid_header(client, sample_user):
+    content = f"t\xe9tle,user_id\nTask,{sample_user['id']}\n".encode("latin-1")
+    response = client.post("/api/tasks/import", files={"file": ("tasks.csv", content)})
+    assert response.status_code == 400
+    assert "UTF-8" in response.json()["detail"]
+    
+    # A header without a newline within the read limit is rejected, not buffered
+    response = client.post("/api/tasks/import", files={"file": ("tasks.csv", b"title," * 20000)})
+    assert response.status_code == 400
+    assert "header" in response.json()["detail"]
+
+def test_import_tasks_title_too_long(client, sample_user):
+    content = f'{{"title": "{"x" * 201}", "user_id": {sample_user["id"]}}}\n'
+    response = client.post("/api/tasks/import?format=ndjson", files={"file": ("tasks.ndjson", content)})
+    assert response.status_code == 400
+    assert "200" in response.json()["detail"]
+    assert client.get("/api/tasks").json() == []
+
+def test_import_tasks_invalid_on_insert(client, sample_user, monkeypatch):
+    import bulk
+    # Let the long title past validation so the insert into varchar(200) fails
+    monkeypatch.setattr(bulk, "TITLE_MAX_LENGTH", 1000)
+    content = f"title,user_id\n{'x' * 201},{sample_user['id']}\n"
+    response = client.post("/api/tasks/import", files={"file": ("tasks.csv", content)})
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid import data")
+    assert client.get("/api/tasks").json() == []
+
+def test_get_task(client, sample_user):
+    create_response = client.post("/api/tasks", json={
+        "title": "Detail Task",
+        "description": "Full description",
+        "user_id": sample_user["id"]
+    })
+    task_id = create_response.json()["id"]
+    
+    response = client.get(f"/api/tasks/{task_id}")
+    assert response.status_code == 200
+    assert response.json() == create_response.json()
+
+def test_get_task_not_found(client):
+    response = client.get("/api/tasks/999")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Task not found"
+
+def test_get_tasks_sparse_fields(client, sample_user):
+    user_id = sample_user["id"]
+    client.post("/api/tasks", json={
+        "title": "Sparse Task",
+        "description": "Large description",
+        "user_id": user_id
+    })
+    
+    response = client.get("/api/tasks?fields=title,completed")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 1
+    assert set(data[0]) == {"id", "title", "completed"}
+    
+    response = client.get(f"/api/users/{user_id}/tasks?fields=title")
+    assert response.status_code == 200
+    assert set(response.json()[0]) == {"id", "title"}
+    
+    task_id = data[0]["id"]
+    response = client.get(f"/api/tasks/{task_id}?fields=description")
+    assert response.json() == {"id": task_id, "description": "Large description"}
+
+def test_get_tasks_unknown_field(client):
+    response = client.get("/api/tasks?fields=title,secret")
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+def test_get_tasks_excludes_archived(client, test_db, sample_user):
+    from datetime import datetime
+    from sqlalchemy import text
+    user_id = sample_user["id"]
+    old_open = client.post("/api/tasks", json={"title": "Old open", "user_id": user_id}).json()
+    old_done = client.post("/api/tasks", json={"title": "Old done", "user_id": user_id}).json()
+    client.post("/api/tasks", json={"title": "Recent", "user_id": user_id})
+    client.put(f"/api/tasks/{old_done['id']}", json={"completed": True})
+    test_db.execute(
+        text("UPDATE tasks SET created_at = :created_at WHERE id IN (:open_id, :done_id)"),
+        {"created_at": datetime(2000, 1, 1), "open_id": old_open["id"], "done_id": old_done["id"]}
+    )
+    
+    titles = {task["title"] for task in client.get("/api/tasks").json()}
+    assert titles == {"Old open", "Recent"}
+    titles = {task["title"] for task in client.get(f"/api/users/{user_id}/tasks").json()}
+    assert titles == {"Old open", "Recent"}
+    
+    titles = {task["title"] for task in client.get("/api/tasks?include_archived=true").json()}
+    assert titles == {"Old open", "Old done", "Recent"}
@@ -22,6 +22,17 @@ interface Task {
   user_id: number;
 }
 
+interface BatchOperation {
+  method?: string;
+  path: string;
+  body?: any;
+}
+
+interface BatchResult {
+  status: number;
+  body: any;
+}
+
 function App() {
   const [message, setMessage] = useState<string>('');
   const [health, setHealth] = useState<string>('');
@@ -45,6 +56,15 @@ function App() {
     return response.json();
   };
 
+  // Runs several API calls in one round trip (and one DB session) via /api/batch
+  const batchAPI = async (requests: BatchOperation[], atomic: boolean = false): Promise<BatchResult[]> => {
+    const response = await fetchFromAPI('/api/batch', {
+      method: 'POST',
+      body: JSON.stringify({ requests, atomic }),
+    });
+    return response.results;
+  };
+
   useEffect(() => {
     loadInitialData();
   }, []);
@@ -52,11 +72,14 @@ function App() {
   const loadInitialData = async () => {
     setLoading(true);
     try {
-      await loadUsers();
-      await loadTasks();
-      
-      const healthResponse = await fetchFromAPI('/api/health');
-      setHealth(`${healthResponse.status} - ${healthResponse.database}`);
+      const [usersResult, tasksResult, healthResult] = await batchAPI([
+        { path: '/api/users' },
+        { path: '/api/tasks' },
+        { path: '/api/health' },
+      ]);
+      setUsers(usersResult.body);
+      setTasks(tasksResult.body);
+      setHealth(`${healthResult.body.status} - ${healthResult.body.database}`);
     } catch (error) {
       setHealth('connection failed');
     }
@@ -66,11 +89,12 @@ function App() {
   const handleTestConnection = async () => {
     setLoading(true);
     try {
-      const rootResponse = await fetchFromAPI('/');
-      setMessage(rootResponse.message || '');
-      
-      const healthResponse = await fetchFromAPI('/api/health');
-      setHealth(`${healthResponse.status} - ${healthResponse.database}`);
+      const [rootResult, healthResult] = await batchAPI([
+        { path: '/' },
+        { path: '/api/health' },
+      ]);
+      setMessage(rootResult.body.message || '');
+      setHealth(`${healthResult.body.status} - ${healthResult.body.database}`);
     } catch (error) {
       setMessage('Error connecting to API');
       setHealth('unhealthy');
@@ -78,35 +102,17 @@ function App() {
     setLoading(false);
   };
 
-  const loadUsers = async () => {
-    try {
-      const users = await fetchFromAPI('/api/users');
-      setUsers(users);
-    } catch (error) {
-      console.error('Error loading users:', error);
-    }
-  };
-
-  const loadTasks = async () => {
-    try {
-      const tasks = await fetchFromAPI('/api/tasks');
-      setTasks(tasks);
-    } catch (error) {
-      console.error('Error loading tasks:', error);
-    }
-  };
-
   const createUser = async () => {
     if (!newUsername || !newEmail) return;
     
     try {
-      await fetchFromAPI('/api/users', {
-        method: 'POST',
-        body: JSON.stringify({ username: newUsername, email: newEmail }),
-      });
+      const [, usersResult] = await batchAPI([
+        { method: 'POST', path: '/api/users', body: { username: newUsername, email: newEmail } },
+        { path: '/api/users' },
+      ]);
       setNewUsername('');
       setNewEmail('');
-      await loadUsers();
+      setUsers(usersResult.body);
     } catch (error) {
       console.error('Error creating user:', error);
     }
@@ -116,18 +122,22 @@ function App() {
     if (!newTaskTitle || !selectedUserId) return;
     
     try {
-      await fetchFromAPI('/api/tasks', {
-        method: 'POST',
-        body: JSON.stringify({
-          title: newTaskTitle,
-          description: newTaskDescription,
-          user_id: selectedUserId
-        }),
-      });
+      const [, tasksResult] = await batchAPI([
+        {
+          method: 'POST',
+          path: '/api/tasks',
+          body: {
+            title: newTaskTitle,
+            description: newTaskDescription,
+            user_id: selectedUserId
+          },
+        },
+        { path: '/api/tasks' },
+      ]);
       setNewTaskTitle('');
       setNewTaskDescription('');
       setSelectedUserId(null);
-      await loadTasks();
+      setTasks(tasksResult.body);
     } catch (error) {
       console.error('Error creating task:', error);
     }
@@ -135,13 +145,11 @@ function App() {
 
   const toggleTaskCompletion = async (taskId: number, currentStatus: boolean) => {
     try {
-      await fetchFromAPI(`/api/tasks/${taskId}`, {
-        method: 'PUT',
-        body: JSON.stringify({
-          completed: !currentStatus
-        }),
-      });
-      await loadTasks();
+      const [, tasksResult] = await batchAPI([
+        { method: 'PUT', path: `/api/tasks/${taskId}`, body: { completed: !currentStatus } },
+        { path: '/api/tasks' },
+      ]);
+      setTasks(tasksResult.body);
     } catch (error) {
       console.error('Error updating task:', error);
     }